@@ -1,6 +1,9 @@
+import logging
+import os
+
 import streamlit as st
-import pandas as pd
-import joblib
+import numpy as np
+from catboost import CatBoostClassifier, FeaturesData
 
 # ---------------- Page config ----------------
 st.set_page_config(
@@ -9,20 +12,7 @@ st.set_page_config(
     layout="wide"
 )
 
-# ---------------- Load artifacts (cached) ----------------
-@st.cache_resource
-def load_artifacts():
-    model = joblib.load("obesity_model.pkl")
-    feature_cols = joblib.load("feature_columns.pkl")
-    return model, feature_cols
-
-model, feature_cols = load_artifacts()
-
-# ---------------- Helpers ----------------
-def build_row(gender, age, family, favc, fcvc, ncp, caec, smoke, ch2o, scc, faf, tue, calc, mtrans):
-    row = [gender, age, family, favc, fcvc, ncp, caec, smoke, ch2o, scc, faf, tue, calc, mtrans]
-    return pd.DataFrame([row], columns=feature_cols)
-
+# ---------------- Labels, rules & defaults ----------------
 def interpret_label(label: str) -> str:
     if "Obesity" in label:
         return "High risk"
@@ -32,25 +22,159 @@ def interpret_label(label: str) -> str:
         return "Healthy range"
     return "Monitor"
 
-def pick_reasons(family, faf, tue, caec, fcvc, ch2o, favc, calc):
-    reasons = []
-    if family == 1:
-        reasons.append("Family history increases baseline risk.")
-    if faf <= 0.7:
-        reasons.append("Low physical activity (FAF) is linked with higher obesity levels.")
-    if tue >= 1.2:
-        reasons.append("Higher screen time (TUE) suggests a more sedentary lifestyle.")
-    if caec in ["Frequently", "Always"]:
-        reasons.append("Frequent snacking between meals (CAEC) is associated with higher weight categories.")
-    if fcvc <= 2.0:
-        reasons.append("Lower vegetable intake (FCVC) reduces a protective dietary factor.")
-    if ch2o <= 1.7:
-        reasons.append("Lower water intake (CH2O) often correlates with less healthy routines.")
-    if favc == 1:
-        reasons.append("Frequent high-calorie food (FAVC) can increase risk when combined with low activity.")
-    if calc in ["Frequently", "Always"]:
-        reasons.append("Higher alcohol consumption (CALC) is associated with increased overweight risk in the data.")
-    return reasons[:4]
+# Frequency scale shared by CAEC and CALC, as small ordinal codes
+_CAT_ORDER = {"no": 0, "Sometimes": 1, "Frequently": 2, "Always": 3}
+
+# Rules for pick_reasons as (sign, threshold, reason): a rule fires when
+# sign * value >= sign * threshold (sign -1 means value <= threshold).
+# Order = display priority.
+_REASON_RULES = [
+    (1, 1, "Family history increases baseline risk."),
+    (-1, 0.7, "Low physical activity (FAF) is linked with higher obesity levels."),
+    (1, 1.2, "Higher screen time (TUE) suggests a more sedentary lifestyle."),
+    (1, 2, "Frequent snacking between meals (CAEC) is associated with higher weight categories."),
+    (-1, 2.0, "Lower vegetable intake (FCVC) reduces a protective dietary factor."),
+    (-1, 1.7, "Lower water intake (CH2O) often correlates with less healthy routines."),
+    (1, 1, "Frequent high-calorie food (FAVC) can increase risk when combined with low activity."),
+    (1, 2, "Higher alcohol consumption (CALC) is associated with increased overweight risk in the data."),
+]
+
+# BMI cut-offs and their (renderer, message); side="right" keeps 18.5/25/30 in the upper band
+_BMI_CUTS = np.array([18.5, 25.0, 30.0])
+_BMI_MSGS = [
+    (st.info, "You're lighter than a feather 🪶 — maybe grab a sandwich and a smoothie!"),
+    (st.success, "Perfectly shaped 😎✨ — your body called, it says 'keep it up!'"),
+    (st.warning, "You're in the 'extra cuddle mode' zone 🧸 — a bit more movement could help!"),
+    (st.error, "You're in 'boss-level mass' mode 🦍 — consider healthier habits (and maybe fewer midnight snacks)."),
+]
+
+# Sidebar state: slider start values, and the full set applied by "Reset to demo values"
+_SLIDER_DEFAULTS = {"age": 25, "fcvc": 2.0, "ncp": 3.0, "ch2o": 2.0, "faf": 1.0, "tue": 1.0}
+_DEMO_VALUES = {
+    **_SLIDER_DEFAULTS,
+    "gender": "Female",
+    "family": 1,
+    "favc": 1,
+    "caec": "Sometimes",
+    "smoke": 0,
+    "scc": 0,
+    "calc": "Sometimes",
+    "mtrans": "Public_Transportation",
+}
+
+# ---------------- Load artifacts (cached) ----------------
+# Packed once per process; cache_resource hands back the same arrays, no rebuild or unpickle
+@st.cache_resource
+def load_reasons_table():
+    return (
+        np.array([rule[0] for rule in _REASON_RULES], dtype=np.float64),
+        np.array([rule[1] for rule in _REASON_RULES], dtype=np.float64),
+        np.array([rule[2] for rule in _REASON_RULES], dtype=object),
+    )
+
+def model_path():
+    # Deploy step: run export_model.py after every retrain. The native .cbm skips
+    # unpickling, but is only trusted while it is at least as new as the pickle.
+    if os.path.exists("obesity_model.cbm") and (
+        not os.path.exists("obesity_model.pkl")
+        or os.path.getmtime("obesity_model.cbm") >= os.path.getmtime("obesity_model.pkl")
+    ):
+        return "obesity_model.cbm"
+    return "obesity_model.pkl"
+
+# The model is a live resource shared across sessions; what we derive from it is plain
+# data and goes through st.cache_data. Both are keyed on the chosen file (path + mtime);
+# model_path() switches files when the pickle is retrained or re-exported.
+@st.cache_resource
+def load_model(path, mtime):
+    if path.endswith(".cbm"):
+        model = CatBoostClassifier()
+        model.load_model(path, format="cbm")
+    else:
+        import joblib  # only needed for the legacy pickle
+
+        # Runs once per model file (cache_resource), so this logs once, not per rerun
+        state = "is older than" if os.path.exists("obesity_model.cbm") else "is missing next to"
+        logging.getLogger(__name__).warning(
+            "obesity_model.cbm %s %s; loading the pickle instead. "
+            "Run export_model.py (a required deploy step) to use the native format.", state, path
+        )
+        model = joblib.load(path)
+    return model
+
+@st.cache_data
+def load_model_tables(path, mtime):
+    import joblib
+
+    model = load_model(path, mtime)
+    feature_cols = joblib.load("feature_columns.pkl")
+
+    # build_rows maps inputs to columns by feature_columns.pkl, so whichever format the
+    # model came from, it must name its features the same way
+    if list(model.feature_names_) != list(feature_cols):
+        raise RuntimeError(
+            f"{path} expects features {model.feature_names_}, "
+            f"but feature_columns.pkl lists {feature_cols}"
+        )
+
+    # Class labels as plain strings, materialized once
+    classes_list = [str(c) for c in model.classes_.tolist()]
+
+    # Positions of numeric vs categorical columns, as CatBoost saw them at fit time
+    cat_idx = set(model.get_cat_feature_indices())
+    num_pos = [i for i in range(len(feature_cols)) if i not in cat_idx]
+    cat_pos = [i for i in range(len(feature_cols)) if i in cat_idx]
+
+    # Class labels are fixed once trained: resolve each one's risk band up front
+    risk_band_map = {c: interpret_label(c) for c in classes_list}
+
+    # One small tuple of lists/dicts: a single cheap unpickle per rerun
+    return feature_cols, classes_list, num_pos, cat_pos, risk_band_map
+
+_model_file = model_path()
+_model_key = (_model_file, os.path.getmtime(_model_file))
+model = load_model(*_model_key)
+feature_cols, classes_list, num_pos, cat_pos, risk_band_map = load_model_tables(*_model_key)
+reasons_table = load_reasons_table()
+
+# ---------------- Helpers ----------------
+def build_rows(rows):
+    # CatBoost's fast path: float32 F-order numerics + object categoricals, no pandas
+    num = np.array([[row[i] for i in num_pos] for row in rows], dtype=np.float32, order="F")
+    cat = np.array([[str(row[i]) for i in cat_pos] for row in rows], dtype=object)
+
+    return FeaturesData(
+        num_feature_data=num,
+        cat_feature_data=cat,
+        num_feature_names=[feature_cols[i] for i in num_pos],
+        cat_feature_names=[feature_cols[i] for i in cat_pos],
+    )
+
+def build_row(gender, age, family, favc, fcvc, ncp, caec, smoke, ch2o, scc, faf, tue, calc, mtrans):
+    return build_rows([(gender, age, family, favc, fcvc, ncp, caec, smoke, ch2o, scc, faf, tue, calc, mtrans)])
+
+def predict_rows(data):
+    # CPU, one thread: tiny batches; predict() == argmax(proba) for MultiClass
+    proba = model.predict_proba(data, thread_count=1, task_type="CPU")
+    labels = [classes_list[i] for i in np.argmax(proba, axis=1)]
+    return labels, proba
+
+@st.cache_data(max_entries=1024)
+def run_prediction(model_key, inputs):
+    # Keyed on the model file and the 14 raw inputs, so repeat clicks / unrelated reruns
+    # skip both the row build and the model; the row is only built on a cache miss
+    labels, proba = predict_rows(build_row(*inputs))
+    return labels[0], proba[0]
+
+def pick_reasons(family, faf, tue, caec_i, fcvc, ch2o, favc, calc_i):
+    # caec_i / calc_i are _CAT_ORDER codes; "Frequently" or more is >= 2
+    values = np.array(
+        [family, faf, tue, caec_i, fcvc, ch2o, favc, calc_i],
+        dtype=np.float64,
+    )
+    signs, thresholds, reasons = reasons_table
+    mask = signs * values >= signs * thresholds
+    return reasons[mask][:4].tolist()
 
 # ---------------- Header ----------------
 st.title("Lifestyle Obesity Risk Calculator")
@@ -74,41 +198,33 @@ with tab1:
     # ---- Sidebar inputs ----
     st.sidebar.header("Inputs (Risk Predictor)")
 
+    # Install slider defaults once per session; the widgets below then read them via key=
+    if "_inited" not in st.session_state:
+        st.session_state.update(_SLIDER_DEFAULTS)
+        st.session_state["_inited"] = True
+
     # Reset demo values
     if st.sidebar.button("Reset to demo values"):
-        st.session_state["age"] = 25
-        st.session_state["gender"] = "Female"
-        st.session_state["family"] = 1
-        st.session_state["favc"] = 1
-        st.session_state["fcvc"] = 2.0
-        st.session_state["ncp"] = 3.0
-        st.session_state["caec"] = "Sometimes"
-        st.session_state["smoke"] = 0
-        st.session_state["ch2o"] = 2.0
-        st.session_state["scc"] = 0
-        st.session_state["faf"] = 1.0
-        st.session_state["tue"] = 1.0
-        st.session_state["calc"] = "Sometimes"
-        st.session_state["mtrans"] = "Public_Transportation"
+        st.session_state.update(_DEMO_VALUES)
 
     gender = st.sidebar.selectbox("Gender", ["Male", "Female"], key="gender")
-    age = st.sidebar.slider("Age", 14, 61, st.session_state.get("age", 25), key="age")
+    age = st.sidebar.slider("Age", 14, 61, key="age")
 
     family = st.sidebar.selectbox("Family history overweight (0=No, 1=Yes)", [0, 1], key="family")
     favc = st.sidebar.selectbox("High-calorie food frequent? (FAVC)", [0, 1], key="favc")
 
-    fcvc = st.sidebar.slider("Vegetable consumption (FCVC: 1–3)", 1.0, 3.0, float(st.session_state.get("fcvc", 2.0)), 0.1, key="fcvc")
-    ncp = st.sidebar.slider("Meals per day (NCP: 1–4)", 1.0, 4.0, float(st.session_state.get("ncp", 3.0)), 0.1, key="ncp")
+    fcvc = st.sidebar.slider("Vegetable consumption (FCVC: 1–3)", 1.0, 3.0, step=0.1, key="fcvc")
+    ncp = st.sidebar.slider("Meals per day (NCP: 1–4)", 1.0, 4.0, step=0.1, key="ncp")
 
     caec = st.sidebar.selectbox("Snacking between meals (CAEC)", ["no", "Sometimes", "Frequently", "Always"], key="caec")
 
     smoke = st.sidebar.selectbox("Smoking (0=No, 1=Yes)", [0, 1], key="smoke")
-    ch2o = st.sidebar.slider("Water intake (CH2O: 1–3)", 1.0, 3.0, float(st.session_state.get("ch2o", 2.0)), 0.1, key="ch2o")
+    ch2o = st.sidebar.slider("Water intake (CH2O: 1–3)", 1.0, 3.0, step=0.1, key="ch2o")
 
     scc = st.sidebar.selectbox("Monitor calories (SCC) (0=No, 1=Yes)", [0, 1], key="scc")
-    faf = st.sidebar.slider("Physical activity (FAF: 0–3)", 0.0, 3.0, float(st.session_state.get("faf", 1.0)), 0.1, key="faf")
+    faf = st.sidebar.slider("Physical activity (FAF: 0–3)", 0.0, 3.0, step=0.1, key="faf")
 
-    tue = st.sidebar.slider("Screen time (TUE: 0–2)", 0.0, 2.0, float(st.session_state.get("tue", 1.0)), 0.1, key="tue")
+    tue = st.sidebar.slider("Screen time (TUE: 0–2)", 0.0, 2.0, step=0.1, key="tue")
 
     calc = st.sidebar.selectbox("Alcohol (CALC)", ["no", "Sometimes", "Frequently", "Always"], key="calc")
     mtrans = st.sidebar.selectbox(
@@ -122,19 +238,16 @@ with tab1:
 
     with left:
         st.subheader("Your inputs (model features)")
-        data = build_row(gender, age, family, favc, fcvc, ncp, caec, smoke, ch2o, scc, faf, tue, calc, mtrans)
-        st.dataframe(data, use_container_width=True)
+        inputs = (gender, age, family, favc, fcvc, ncp, caec, smoke, ch2o, scc, faf, tue, calc, mtrans)
+        st.table({col: [val] for col, val in zip(feature_cols, inputs)})
 
     with right:
         st.subheader("Prediction")
         if st.button("Predict"):
-            pred = model.predict(data)[0]
-            proba = model.predict_proba(data)[0]
-
-            risk_band = interpret_label(str(pred))
+            pred, proba = run_prediction(_model_key, inputs)
 
-            # CatBoost sometimes returns ['label'] as a list; make it string-safe
-            pred_str = pred[0] if isinstance(pred, (list, tuple)) else str(pred)
+            pred_str = str(pred)
+            risk_band = risk_band_map.get(pred_str, "Monitor")
 
             if risk_band == "High risk":
                 st.error(f"Predicted category: **{pred_str}**  |  Risk band: **{risk_band}**")
@@ -145,17 +258,20 @@ with tab1:
             else:
                 st.info(f"Predicted category: **{pred_str}**  |  Risk band: **{risk_band}**")
 
-            prob_df = pd.DataFrame({"Category": model.classes_, "Probability": proba})
-            prob_df = prob_df.sort_values("Probability", ascending=False).reset_index(drop=True)
+            # Partial selection of the top 3, then order just those 3
+            k = min(3, len(proba))
+            top_idx = np.argpartition(-proba, k - 1)[:k]
+            top_idx = top_idx[np.argsort(-proba[top_idx])]
 
             st.markdown("### Top 3 probabilities")
-            st.table(prob_df.head(3))
+            st.table({"Category": [classes_list[i] for i in top_idx], "Probability": proba[top_idx]})
 
             st.markdown("### Probability distribution")
-            st.bar_chart(prob_df.set_index("Category"))
+            st.bar_chart({"Probability": dict(zip(classes_list, proba.tolist()))})
 
             st.markdown("### Why this result?")
-            reasons = pick_reasons(family, faf, tue, caec, fcvc, ch2o, favc, calc)
+            caec_i, calc_i = _CAT_ORDER[caec], _CAT_ORDER[calc]
+            reasons = pick_reasons(family, faf, tue, caec_i, fcvc, ch2o, favc, calc_i)
             if reasons:
                 for r in reasons:
                     st.write("• " + r)
@@ -182,13 +298,7 @@ with tab2:
         st.subheader(f"Your BMI: {bmi:.1f}")
 
         # Fun comments (light + non-shaming)
-        if bmi < 18.5:
-            st.info("You're lighter than a feather 🪶 — maybe grab a sandwich and a smoothie!")
-        elif bmi < 25:
-            st.success("Perfectly shaped 😎✨ — your body called, it says 'keep it up!'")
-        elif bmi < 30:
-            st.warning("You're in the 'extra cuddle mode' zone 🧸 — a bit more movement could help!")
-        else:
-            st.error("You're in 'boss-level mass' mode 🦍 — consider healthier habits (and maybe fewer midnight snacks).")
+        fn, msg = _BMI_MSGS[int(np.searchsorted(_BMI_CUTS, bmi, side="right"))]
+        fn(msg)
 
         st.caption("BMI is a simple metric and doesn’t reflect muscle mass, body composition, or overall health.")
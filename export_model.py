@@ -0,0 +1,55 @@
+"""Offline step: convert the pickled CatBoost model to CatBoost's native .cbm format.
+
+Run from the folder the app is started from (the one holding obesity_model.pkl):
+
+    python export_model.py
+
+The .cbm file holds only the tree ensemble and its metadata. It is smaller on
+disk and loads without rebuilding the Python wrapper's object graph, which
+keeps per-worker memory and startup time down in the Streamlit app.
+"""
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from catboost import CatBoostClassifier
+
+SRC = "obesity_model.pkl"
+DST = "obesity_model.cbm"
+
+# A couple of rows covering both ends of the inputs, in feature_columns.pkl order
+SAMPLE_ROWS = [
+    ["Female", 25, 1, 1, 2.0, 3.0, "Sometimes", 0, 2.0, 0, 1.0, 1.0, "Sometimes", "Public_Transportation"],
+    ["Male", 45, 0, 0, 3.0, 1.0, "Always", 1, 1.0, 1, 0.0, 2.0, "Frequently", "Automobile"],
+]
+
+model = joblib.load(SRC)
+feature_cols = joblib.load("feature_columns.pkl")
+
+# Write to a temp file and only move it onto DST once every check passes: the app
+# prefers DST whenever it exists, so an unverified export must never land there.
+tmp = DST + ".tmp"
+model.save_model(tmp, format="cbm")
+
+try:
+    # Round-trip check: the app relies on the labels, the column layout and the scores
+    reloaded = CatBoostClassifier()
+    reloaded.load_model(tmp, format="cbm")
+
+    if list(reloaded.classes_) != list(model.classes_):
+        raise RuntimeError("class labels changed on export")
+    if list(reloaded.get_cat_feature_indices()) != list(model.get_cat_feature_indices()):
+        raise RuntimeError("categorical feature indices changed on export")
+    if list(reloaded.feature_names_) != list(model.feature_names_):
+        raise RuntimeError("feature names changed on export")
+
+    sample = pd.DataFrame(SAMPLE_ROWS, columns=feature_cols)
+    if not np.allclose(reloaded.predict_proba(sample), model.predict_proba(sample)):
+        raise RuntimeError("predict_proba differs between the pickle and the exported .cbm")
+except Exception:
+    os.remove(tmp)
+    raise
+
+os.replace(tmp, DST)
+print(f"Wrote {DST} ({model.tree_count_} trees, {len(model.classes_)} classes)")